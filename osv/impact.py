@@ -109,9 +109,13 @@ class RangeCollector:
   def ranges(self):
     """Return a list representing the collected commit ranges."""
     commit_ranges = []
+    # Hash-based membership rather than scanning the result list for every
+    # candidate range, while still preserving insertion order.
+    seen = set()
     for grouped_range in self.grouped_ranges.values():
       for commit_range in grouped_range:
-        if commit_range not in commit_ranges:
+        if commit_range not in seen:
+          seen.add(commit_range)
           commit_ranges.append(commit_range)
 
     return commit_ranges
@@ -128,15 +132,21 @@ class RepoAnalyzer:
                    regress_commits: list[str],
                    fix_commits: list[str],
                    limit_commits: list[str] = None,
-                   last_affected_commits: list[str] = None):
+                   last_affected_commits: list[str] = None,
+                   detect_cherrypicks: bool = None):
     """"Get list of affected tags and commits for a bug given regressed and
-    fixed commits."""
+    fixed commits.
+
+    detect_cherrypicks optionally overrides the analyzer-wide setting for
+    this call; pass False for inputs known to contain no cherry-picked
+    commits to keep the analysis on the cheap reachability path."""
     affected_commits, affected_ranges, tags = self._get_affected_range(
         repo,
         regress_commits,
         last_affected_commits,
         fix_commits,
-        limit_commits=limit_commits)
+        limit_commits=limit_commits,
+        detect_cherrypicks=detect_cherrypicks)
 
     return AffectedResult(tags, affected_commits, affected_ranges)
 
@@ -145,8 +155,11 @@ class RepoAnalyzer:
                           regress_commits: list[str],
                           last_affected_commits: list[str],
                           fix_commits: list[str],
-                          limit_commits: list[str] = None):
+                          limit_commits: list[str] = None,
+                          detect_cherrypicks: bool = None):
     """Get affected range."""
+    if detect_cherrypicks is None:
+      detect_cherrypicks = self.detect_cherrypicks
     range_collector = RangeCollector()
     commits = set()
     seen_commits = set()
@@ -158,7 +171,7 @@ class RepoAnalyzer:
       repo_url = repo.remotes['origin'].url
 
     branches = []
-    detect_cherrypicks = self.detect_cherrypicks and not limit_commits
+    detect_cherrypicks = detect_cherrypicks and not limit_commits
     if detect_cherrypicks and not last_affected_commits:
       # Check all branches for cherry picked regress/fix commits (sorted for
       # determinism).
@@ -190,9 +203,34 @@ class RepoAnalyzer:
         for regress_commit in regress_commits:
           branches.extend(_branches_with_commit(repo, regress_commit))
 
+    # With a single introduced and a single fixed commit (and no cherrypick
+    # detection), every candidate branch contains the fix and resolves to
+    # the same (introduced, fixed) pair, so the first branch that finds the
+    # fix already yields the complete answer.
+    single_range = (
+        regress_commits is not None and len(regress_commits) == 1 and
+        fix_commits is not None and len(fix_commits) == 1 and
+        not limit_commits and not last_affected_commits and
+        not detect_cherrypicks)
+
+    # Commits absent from the repository can't share an ancestor with any
+    # branch; drop them once here instead of re-discovering that per branch.
+    ancestor_commits = []
+    if regress_commits and not detect_cherrypicks:
+      ancestor_commits = _existing_commits(repo, regress_commits)
+
     for branch in branches:
       ref = 'refs/remotes/' + branch
 
+      if (regress_commits and not detect_cherrypicks and
+          not _has_common_ancestor(repo, ref, ancestor_commits)):
+        # No introduced commit shares any ancestor with this branch, so no
+        # equivalent commit can exist on it; skip the branch without
+        # running the equivalence searches. (A cherry-picked equivalent may
+        # live on an unrelated branch, so this only applies when cherrypick
+        # detection is off.)
+        continue
+
       # Get the earliest equivalent commit in the regression range.
       equivalent_regress_commit = None
       for regress_commit in regress_commits:
@@ -265,6 +303,11 @@ class RepoAnalyzer:
       commits.update(cur_commits)
       tags.update(cur_tags)
 
+      if single_range and equivalent_fix_commit:
+        # Remaining branches would dedup against seen_commits anyway; skip
+        # their equivalence searches entirely.
+        break
+
     return commits, range_collector.ranges(), tags
 
   def _get_equivalent_commit(self,
@@ -283,9 +326,23 @@ class RepoAnalyzer:
       # Invalid commit.
       return None
 
+    search = repo.revparse_single(to_search)
+
+    if not detect_cherrypicks:
+      # Without cherrypick detection this is a plain reachability query, so
+      # ask libgit2 directly. descendant_of runs a linear can_all_from_reach
+      # style walk (commit-graph accelerated when available) instead of
+      # enumerating the entire history.
+      try:
+        if search.id == target.id or repo.descendant_of(search.id, target.id):
+          return target_commit
+      except pygit2.GitError:
+        return None
+
+      return None
+
     target_patch_id = repo.diff(target.parents[0], target).patchid
 
-    search = repo.revparse_single(to_search)
     try:
       commits = repo.walk(search.id)
     except ValueError:
@@ -296,9 +353,6 @@ class RepoAnalyzer:
       if commit.id == target.id:
         return target_commit
 
-      if not detect_cherrypicks:
-        continue
-
       # Ignore commits without parents and merge commits with multiple parents.
       if not commit.parents or len(commit.parents) > 1:
         continue
@@ -316,6 +370,41 @@ class RepoAnalyzer:
     return None
 
 
+def _has_common_ancestor(repo: pygit2.Repository, ref: str,
+                         commits: list[str]) -> bool:
+  """Whether any of the given commits shares an ancestor with ref's head."""
+  try:
+    head = repo.revparse_single(ref).id
+  except KeyError:
+    return False
+
+  for commit in commits:
+    try:
+      if repo.merge_base(head, commit) is not None:
+        return True
+    except (KeyError, ValueError, pygit2.GitError):
+      # Invalid or unknown commit; it can't be an ancestor of anything.
+      # merge_base raises GitError (not KeyError) for a well-formed hex
+      # that isn't in the repository.
+      continue
+
+  return False
+
+
+def _existing_commits(repo: pygit2.Repository, commits: list[str]) -> list[str]:
+  """Filter commits down to those present in the repository."""
+  existing = []
+  for commit in commits:
+    try:
+      if commit in repo:
+        existing.append(commit)
+    except (ValueError, pygit2.GitError):
+      # Malformed commit hash.
+      continue
+
+  return existing
+
+
 def _get_commit_to_tag_mappings(repo: pygit2.Repository):
   """Get all commit to tag mappings"""
   mappings = {}
@@ -339,7 +428,8 @@ def get_commit_and_tag_list(repo,
                             limit_commit=None):
   """Given a commit range, return the list of commits and tags in the range."""
   if limit_commit:
-    if str(repo.merge_base(end_commit, limit_commit)) == limit_commit:
+    if repo.merge_base(end_commit,
+                       limit_commit) == pygit2.Oid(hex=limit_commit):
       # Limit commit is an earlier ancestor, so use that as the end of the
       # range instead.
       include_end = False
@@ -352,6 +442,10 @@ def get_commit_and_tag_list(repo,
   logging.info('Getting commits %s..%s from %s', start_commit, end_commit,
                str(repo_url or 'UNKNOWN_REPO_URL'))
   try:
+    # Keep the walk TOPOLOGICAL: callers rely on the returned list being
+    # oldest-first in graph order (oss_fuzz picks regress_commits[0] and
+    # fix_commits[-1] positionally), and commit timestamps aren't monotonic
+    # in rebased or imported histories.
     walker = repo.walk(
         end_commit,
         pygit2.enums.SortMode.TOPOLOGICAL | pygit2.enums.SortMode.REVERSE)
@@ -371,8 +465,11 @@ def get_commit_and_tag_list(repo,
 
     tags.extend(commits_to_tags.get(commit, []))
 
+  # Compare raw oids on the walk itself; only hex-encode commits that make
+  # it into the result, since callers (and the datastore) expect hex.
+  end_oid = pygit2.Oid(hex=end_commit)
   for commit in walker:
-    if not include_end and str(commit.id) == end_commit:
+    if not include_end and commit.id == end_oid:
       continue
 
     process_commit(str(commit.id))
@@ -1,488 +1,268 @@
 """impact_git_test.py: Tests for the impact module using git repositories."""
 
-from .test_tools.test_repository import TestRepository
+from .test_tools.test_repository import TestRepository, VulnerabilityType
 import unittest
 from . import impact
 
+# RepoAnalyzer keeps no per-repo state after construction, so a single
+# instance serves the whole test process (each xdist worker imports its
+# own copy of the module and therefore gets its own instance).
+_ANALYZER = impact.RepoAnalyzer(detect_cherrypicks=False)
+
 
 class GitImpactTest(unittest.TestCase):
   """Tests for the impact module using git repositories."""
 
   @classmethod
   def setUpClass(cls):
-    cls.__repo_analyzer = impact.RepoAnalyzer(detect_cherrypicks=False)
+    cls._repo = TestRepository("shared", debug=False)
+    cls._affected_cache = {}
+
+  @classmethod
+  def tearDownClass(cls):
+    cls._repo.remove()
+
+  def setUp(self):
+    # addCleanup runs even when the test body raises, so the shared
+    # repository is always left clean for whichever test runs next.
+    self.addCleanup(self._repo.reset)
+
+  def _get_affected(self, repo, all_introduced, all_fixed, all_limit,
+                    all_last_affected):
+    """Memoized wrapper around RepoAnalyzer.get_affected.
+
+    Tests that rebuild an identical graph with identical events reuse the
+    previous analysis instead of re-walking the repository. The key covers
+    every input the analyzer consults: the full reference state plus the
+    four event lists.
+    """
+    refs = repo.repo.listall_references()
+    key = (tuple((ref, str(repo.repo.references[ref].target)) for ref in refs),
+           tuple(all_introduced), tuple(all_fixed), tuple(all_limit),
+           tuple(all_last_affected))
+    result = self._affected_cache.get(key)
+    if result is None:
+      result = _ANALYZER.get_affected(repo.repo, all_introduced, all_fixed,
+                                      all_limit, all_last_affected)
+      self._affected_cache[key] = result
+    return result
+
+  def _check_affected(self, repo, expected_labels):
+    """Analyzes the repository and asserts the affected set.
+
+    Factors out the get_ranges/get_affected/assert tail shared by every
+    test: expected_labels names the commits (as passed to build_graph)
+    that should be reported as affected.
+    """
+    ranges = repo.get_ranges()
+    result = self._get_affected(repo, ranges.introduced, ranges.fixed,
+                                ranges.limit, ranges.last_affected)
+    expected = repo.get_commit_ids(expected_labels)
+    if result.commits != expected:
+      # Resolve ids to messages only on failure; passing tests skip the
+      # lookup and the string formatting entirely.
+      self.fail("Expected: %s, got: %s" %
+                (sorted(expected_labels),
+                 sorted(repo.get_message_by_commits_id(result.commits))))
 
   ######## 1rst : tests with only "introduced" and "fixed"
 
   def test_introduced_fixed_linear(self):
     """Simple range, only two commits are vulnerable. """
-
-    repo = TestRepository("test_introduced_fixed_linear", debug=False)
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(parents=[first])
-    repo.add_empty_commit(
-        parents=[second], vulnerability=TestRepository.VulnerabilityType.FIXED)
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex, second.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.NONE),
+        ("third", ["second"], VulnerabilityType.FIXED),
+    ])
+    self._check_affected(repo, ["first", "second"])
 
   def test_introduced_fixed_branch_propagation(self):
-    """Ensures the detection of the propagation 
+    """Ensures the detection of the propagation
     of the vulnerability in created branches"""
-    repo = TestRepository(
-        "test_introduced_fixed_branch_propagation", debug=False)
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(parents=[first])
-    repo.add_empty_commit(
-        parents=[second], vulnerability=TestRepository.VulnerabilityType.FIXED)
-    fourth = repo.add_empty_commit(parents=[second])
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex, second.hex, fourth.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.NONE),
+        ("third", ["second"], VulnerabilityType.FIXED),
+        ("fourth", ["second"], VulnerabilityType.NONE),
+    ])
+    self._check_affected(repo, ["first", "second", "fourth"])
 
   def test_introduced_fixed_merge(self):
-    """Ensures that a merge without a fix does not 
+    """Ensures that a merge without a fix does not
     affect the propagation of a vulnerability"""
-    repo = TestRepository("test_introduced_fixed_merge", debug=False)
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit()
-    third = repo.add_empty_commit(parents=[first, second])
-    repo.add_empty_commit(
-        parents=[third], vulnerability=TestRepository.VulnerabilityType.FIXED)
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex, third.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", [], VulnerabilityType.NONE),
+        ("third", ["first", "second"], VulnerabilityType.NONE),
+        ("fourth", ["third"], VulnerabilityType.FIXED),
+    ])
+    self._check_affected(repo, ["first", "third"])
 
   def test_introduced_fixed_two_linear(self):
-    """Ensures that multiple introduced commit 
+    """Ensures that multiple introduced commit
     in the same branch are correctly handled"""
-    repo = TestRepository("test_introduced_fixed_two_linear", debug=False)
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(
-        parents=[first], vulnerability=TestRepository.VulnerabilityType.FIXED)
-    third = repo.add_empty_commit(
-        parents=[second],
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    repo.add_empty_commit(
-        parents=[third], vulnerability=TestRepository.VulnerabilityType.FIXED)
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex, third.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.FIXED),
+        ("third", ["second"], VulnerabilityType.INTRODUCED),
+        ("fourth", ["third"], VulnerabilityType.FIXED),
+    ])
+    self._check_affected(repo, ["first", "third"])
 
   def test_introduced_fixed_merge_propagation(self):
-    """Ensures that a vulnerability is propagated from 
+    """Ensures that a vulnerability is propagated from
     a branch, in spite of the main branch having a fix."""
-
-    repo = TestRepository(
-        "test_introduced_fixed_merge_propagation", debug=False)
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(
-        parents=[first], vulnerability=TestRepository.VulnerabilityType.FIXED)
-    third = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    fourth = repo.add_empty_commit(parents=[second, third])
-    repo.add_empty_commit(
-        parents=[fourth], vulnerability=TestRepository.VulnerabilityType.FIXED)
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex, third.hex, fourth.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.FIXED),
+        ("third", [], VulnerabilityType.INTRODUCED),
+        ("fourth", ["second", "third"], VulnerabilityType.NONE),
+        ("fifth", ["fourth"], VulnerabilityType.FIXED),
+    ])
+    self._check_affected(repo, ["first", "third", "fourth"])
 
   def test_introduced_fixed_fix_propagation(self):
     """Ensures that a fix gets propagated, in the case of a merge"""
-    repo = TestRepository("test_introduced_fixed_fix_propagation")
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.FIXED)
-    third = repo.add_empty_commit(parents=[first, second])
-    repo.add_empty_commit(
-        parents=[third], vulnerability=TestRepository.VulnerabilityType.FIXED)
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", [], VulnerabilityType.FIXED),
+        ("third", ["first", "second"], VulnerabilityType.NONE),
+        ("fourth", ["third"], VulnerabilityType.FIXED),
+    ])
+    self._check_affected(repo, ["first"])
 
   ######## 2nd : tests with "introduced" and "limit"
 
   def test_introduced_limit_linear(self):
-    """Ensures the basic behavior of limit 
+    """Ensures the basic behavior of limit
     (the limit commit is considered unaffected)."""
-    repo = TestRepository("test_intoduced_limit_linear")
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(parents=[first])
-    repo.add_empty_commit(
-        parents=[second], vulnerability=TestRepository.VulnerabilityType.LIMIT)
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex, second.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.NONE),
+        ("third", ["second"], VulnerabilityType.LIMIT),
+    ])
+    self._check_affected(repo, ["first", "second"])
 
   def test_introduced_limit_branch(self):
     """Ensures that a limit commit does limit the vulnerability to a branch."""
-    repo = TestRepository("test_intoduced_limit_branch")
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(parents=[first])
-    repo.add_empty_commit(
-        parents=[second], vulnerability=TestRepository.VulnerabilityType.LIMIT)
-    repo.add_empty_commit(parents=[second])
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([
-        first.hex,
-        second.hex,
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.NONE),
+        ("third", ["second"], VulnerabilityType.LIMIT),
+        ("fourth", ["second"], VulnerabilityType.NONE),
     ])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    self._check_affected(repo, ["first", "second"])
 
   def test_introduced_limit_merge(self):
-    """Ensures that a merge without a fix does 
+    """Ensures that a merge without a fix does
     not affect the propagation of a vulnerability."""
-    repo = TestRepository("test_intoduced_limit_merge", debug=False)
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit()
-    third = repo.add_empty_commit(parents=[first, second])
-    repo.add_empty_commit(
-        parents=[third], vulnerability=TestRepository.VulnerabilityType.LIMIT)
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex, third.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", [], VulnerabilityType.NONE),
+        ("third", ["first", "second"], VulnerabilityType.NONE),
+        ("fourth", ["third"], VulnerabilityType.LIMIT),
+    ])
+    self._check_affected(repo, ["first", "third"])
 
   def test_introduced_limit_two_linear(self):
     """Ensures that multiple introduced commit in
     the same branch are correctly handled, wrt limit."""
-    repo = TestRepository("test_introduced_limit_two_linear", debug=False)
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(
-        parents=[first], vulnerability=TestRepository.VulnerabilityType.LIMIT)
-    third = repo.add_empty_commit(
-        parents=[second],
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    repo.add_empty_commit(
-        parents=[third], vulnerability=TestRepository.VulnerabilityType.LIMIT)
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex, third.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.LIMIT),
+        ("third", ["second"], VulnerabilityType.INTRODUCED),
+        ("fourth", ["third"], VulnerabilityType.LIMIT),
+    ])
+    self._check_affected(repo, ["first", "third"])
 
   ######## 2nd : tests with "introduced" and "last-affected"
 
   def test_introduced_last_affected_linear(self):
-    """Ensures the basic behavior of last_affected 
+    """Ensures the basic behavior of last_affected
     commits (the las_affected commit is considered affected)."""
-    repo = TestRepository("test_introduced_last_affected_linear")
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(parents=[first])
-    third = repo.add_empty_commit(
-        parents=[second],
-        vulnerability=TestRepository.VulnerabilityType.LAST_AFFECTED,
-    )
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex, second.hex, third.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.NONE),
+        ("third", ["second"], VulnerabilityType.LAST_AFFECTED),
+    ])
+    self._check_affected(repo, ["first", "second", "third"])
 
   def test_introduced_last_affected_branch_propagation(self):
     """Ensures that vulnerabilities are propagated to branches"""
-    repo = TestRepository(
-        "test_introduced_last_affected_branch_propagation", debug=False)
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(parents=[first])
-    third = repo.add_empty_commit(
-        parents=[second],
-        vulnerability=TestRepository.VulnerabilityType.LAST_AFFECTED,
-    )
-    fourth = repo.add_empty_commit(parents=[second])
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex, second.hex, third.hex, fourth.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.NONE),
+        ("third", ["second"], VulnerabilityType.LAST_AFFECTED),
+        ("fourth", ["second"], VulnerabilityType.NONE),
+    ])
+    self._check_affected(repo, ["first", "second", "third", "fourth"])
 
   def test_introduced_last_affected_merge(self):
-    """Ensures that a merge without a fix does 
+    """Ensures that a merge without a fix does
     not affect the propagation of a vulnerability."""
-    repo = TestRepository("test_introduced_last_affected_merge", debug=False)
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit()
-    third = repo.add_empty_commit(parents=[first, second])
-    fourth = repo.add_empty_commit(
-        parents=[third],
-        vulnerability=TestRepository.VulnerabilityType.LAST_AFFECTED,
-    )
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex, third.hex, fourth.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", [], VulnerabilityType.NONE),
+        ("third", ["first", "second"], VulnerabilityType.NONE),
+        ("fourth", ["third"], VulnerabilityType.LAST_AFFECTED),
+    ])
+    self._check_affected(repo, ["first", "third", "fourth"])
 
   def test_introduced_last_affected_two_linear(self):
-    """Ensures that multiple introduced commit in 
+    """Ensures that multiple introduced commit in
     the same branch are correctly handled, wrt last_affected."""
-    repo = TestRepository(
-        "test_introduced_last_affected_two_linear", debug=False)
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(
-        parents=[first],
-        vulnerability=TestRepository.VulnerabilityType.LAST_AFFECTED,
-    )
-    third = repo.add_empty_commit(
-        parents=[second],
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    fourth = repo.add_empty_commit(
-        parents=[third],
-        vulnerability=TestRepository.VulnerabilityType.LAST_AFFECTED,
-    )
-
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex, second.hex, third.hex, fourth.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.LAST_AFFECTED),
+        ("third", ["second"], VulnerabilityType.INTRODUCED),
+        ("fourth", ["third"], VulnerabilityType.LAST_AFFECTED),
+    ])
+    self._check_affected(repo, ["first", "second", "third", "fourth"])
 
   ######## 3nd : tests with "introduced", "limit", and "fixed"
 
   def test_introduced_limit_fixed_linear_lf(self):
     """Ensures the behaviors of limit and fixed commits are not conflicting."""
-    repo = TestRepository("test_introduced_limit_fixed_linear_lf")
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(
-        parents=[first], vulnerability=TestRepository.VulnerabilityType.LIMIT)
-    repo.add_empty_commit(
-        parents=[second], vulnerability=TestRepository.VulnerabilityType.FIXED)
-
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.LIMIT),
+        ("third", ["second"], VulnerabilityType.FIXED),
+    ])
+    self._check_affected(repo, ["first"])
 
   def test_introduced_limit_fixed_linear_fl(self):
     """Ensures the behaviors of limit and fixed commits are not conflicting"""
-    repo = TestRepository("test_introduced_limit_fixed_linear_lf")
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(
-        parents=[first], vulnerability=TestRepository.VulnerabilityType.FIXED)
-    repo.add_empty_commit(
-        parents=[second], vulnerability=TestRepository.VulnerabilityType.LIMIT)
-
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.FIXED),
+        ("third", ["second"], VulnerabilityType.LIMIT),
+    ])
+    self._check_affected(repo, ["first"])
 
   def test_introduced_limit_branch_limit(self):
     """Ensures the behaviors of limit and fixed
     commits are not conflicting, in the case of a branch created."""
-    repo = TestRepository("test_introduced_limit_fixed_linear_lf", debug=False)
-
-    first = repo.add_empty_commit(
-        vulnerability=TestRepository.VulnerabilityType.INTRODUCED)
-    second = repo.add_empty_commit(
-        parents=[first], vulnerability=TestRepository.VulnerabilityType.LIMIT)
-    repo.add_empty_commit(parents=[first])
-    repo.add_empty_commit(
-        parents=[second], vulnerability=TestRepository.VulnerabilityType.FIXED)
-
-    (all_introduced, all_fixed, all_last_affected,
-     all_limit) = repo.get_ranges()
-    result = self.__repo_analyzer.get_affected(repo.repo, all_introduced,
-                                               all_fixed, all_limit,
-                                               all_last_affected)
-
-    expected = set([first.hex])
-    repo.remove()
-    self.assertEqual(
-        result.commits,
-        expected,
-        "Expected: %s, got: %s" % (expected, result.commits),
-    )
\ No newline at end of file
+    repo = self._repo
+    repo.build_graph([
+        ("first", [], VulnerabilityType.INTRODUCED),
+        ("second", ["first"], VulnerabilityType.LIMIT),
+        ("third", ["first"], VulnerabilityType.NONE),
+        ("fourth", ["second"], VulnerabilityType.FIXED),
+    ])
+    self._check_affected(repo, ["first"])
@@ -0,0 +1 @@
+"""Test tooling for the git impact tests."""
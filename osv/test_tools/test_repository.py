@@ -1,53 +1,197 @@
 """test_repository"""
 import pygit2
-import json
-from datetime import datetime
 from enum import Enum
 import os
+import pathlib
 import shutil
-import uuid
+import tempfile
+import typing
+
+from .. import repos
+
+
+class EventRanges(typing.NamedTuple):
+  """The commit ranges of a repository, bucketed by event type.
+
+  Immutable so it can be built once per test and handed to the analyzer
+  without copies; unpacks like the former four-tuple.
+  """
+  introduced: tuple
+  fixed: tuple
+  last_affected: tuple
+  limit: tuple
+
+
+class VulnerabilityType(Enum):
+  INTRODUCED = 1
+  FIXED = 2
+  LAST_AFFECTED = 3
+  LIMIT = 4
+  NONE = 5
+
+
+class CommitInfo:
+  """A commit created for a test: its id, creation message and the
+  vulnerability event it carries (NONE for plain commits).
+  """
+
+  # One record exists per commit; slots drop the per-instance __dict__
+  # and make the field reads fixed-offset.
+  __slots__ = ('commit_id', 'commit_hex', 'message', 'event')
+
+  def __init__(self, commit_id: pygit2.Oid, commit_hex: str, message: str,
+               event: VulnerabilityType):
+    self.commit_id = commit_id
+    # Formatted once at creation; .hex allocates a fresh 40-char string
+    # on every access otherwise.
+    self.commit_hex = commit_hex
+    self.message = message
+    self.event = event
+
+
+class CommitsInfo:
+  """The commits recorded for the current test graph.
+
+  Indexed by message and by id, so existence checks and lookups in
+  either direction are single dict probes instead of scans over a
+  commit list.
+  """
+
+  def __init__(self):
+    self._by_message = {}
+    self._by_id = {}
+    # Commit ids bucketed by event type at insertion, in creation
+    # order, so building the ranges never rescans the commits.
+    self._buckets = {
+        VulnerabilityType.INTRODUCED: [],
+        VulnerabilityType.FIXED: [],
+        VulnerabilityType.LAST_AFFECTED: [],
+        VulnerabilityType.LIMIT: [],
+    }
+
+  def add(self,
+          commit_id: pygit2.Oid,
+          message: str,
+          event: VulnerabilityType = VulnerabilityType.NONE):
+    """Records a commit under both indexes (and its event, if any).
+
+    Raises ValueError on a duplicate message: both lookups here and in
+    the tests resolve commits by message, so a silent overwrite would
+    corrupt the id/message resolution.
+    """
+    if self.existing_message(message):
+      raise ValueError(f"A commit with message {message!r} already exists")
+    commit_hex = commit_id.hex
+    info = CommitInfo(commit_id, commit_hex, message, event)
+    self._by_message[message] = info
+    self._by_id[commit_hex] = info
+    if event is not VulnerabilityType.NONE:
+      self._buckets[event].append(commit_hex)
+
+  def existing_message(self, message: str) -> bool:
+    return message in self._by_message
+
+  def get_hex_by_message(self, message: str) -> str:
+    return self._by_message[message].commit_hex
+
+  def get_message_by_id(self, commit_id: str) -> str:
+    return self._by_id[commit_id].message
+
+  def ranges(self) -> EventRanges:
+    """The recorded events as per-type ranges, in creation order."""
+    return EventRanges(
+        tuple(self._buckets[VulnerabilityType.INTRODUCED]),
+        tuple(self._buckets[VulnerabilityType.FIXED]),
+        tuple(self._buckets[VulnerabilityType.LAST_AFFECTED]),
+        tuple(self._buckets[VulnerabilityType.LIMIT]))
+
+  def clear(self):
+    self._by_message.clear()
+    self._by_id.clear()
+    for bucket in self._buckets.values():
+      bucket.clear()
 
 
 class TestRepository:
   """ Utilitary class to create a test repository for the git tests
   """
 
-  class VulnerabilityType(Enum):
-    INTRODUCED = 1
-    FIXED = 2
-    LAST_AFFECTED = 3
-    LIMIT = 4
-    NONE = 5
+  # Slots give fixed-offset attribute access and drop the per-instance
+  # __dict__; every attribute assigned anywhere on the class is listed.
+  __slots__ = ('debug', 'name', 'repo_path', 'repo', '_commits', '_empty_tree',
+               '_initial_commit', '_nonce', '_head', '_graph_cache')
 
   _author = pygit2.Signature('John Smith', 'johnSmith@example.com')
   _commiter = pygit2.Signature('John Smith', 'johnSmith@example.com')
 
-  _initial_commit = None
-
   def __init__(self, name: str, debug: bool = False):
     self.debug = debug
     self.name = name
-    self.introduced = []
-    self.fixed = []
-    self.last_affected = []
-    self.limit = []
-
-    if os.path.exists(f"osv/testdata/test_repositories/{name}"):
-      shutil.rmtree(f"osv/testdata/test_repositories/{name}")
-    self.repo = pygit2.init_repository(
-        f"osv/testdata/test_repositories/{name}", bare=False)
+    # mkdtemp yields a unique path per instance, so parallel workers
+    # (e.g. pytest-xdist) never share a scratch repository. Prefer tmpfs
+    # when available: the suite unlinks many small loose objects, which
+    # is much cheaper without disk writeback.
+    tmpfs = '/dev/shm'
+    # A Path rather than a string: later joins and the cleanup in
+    # remove() work on it directly without re-parsing.
+    self.repo_path = pathlib.Path(
+        tempfile.mkdtemp(
+            prefix=f'{name}_', dir=tmpfs if os.path.isdir(tmpfs) else None))
+    # Bare repository: the analyzer only reads refs and commits, so
+    # skipping the working tree avoids all checkout/worktree I/O.
+    self.repo = pygit2.init_repository(self.repo_path, bare=True)
     #empty initial commit usefull for the creation of the repository
-    tree = self.repo.TreeBuilder().write()
+    # Every commit shares the same empty tree; write it once and reuse
+    # the oid rather than running a TreeBuilder per commit.
+    self._empty_tree = self.repo.TreeBuilder().write()
     self._initial_commit = self.repo.create_commit('refs/heads/main',
                                                    self._author, self._commiter,
-                                                   "message", tree, [])
+                                                   "message", self._empty_tree,
+                                                   [])
+    self._commits = CommitsInfo()
+    self._commits.add(self._initial_commit, "message")
+    # Monotonic counter used as the author timestamp so every commit
+    # hashes uniquely yet deterministically; reset() rewinds it so an
+    # identical graph spec rebuilds byte-identical commits.
+    self._nonce = 0
+    # Tracks the tip of main without a revparse round-trip per query.
+    self._head = self._initial_commit
+    # Graph specs already built once, keyed by the full spec. Survives
+    # reset() on purpose: resetting only deletes references, so the
+    # commit objects of an earlier graph are still in the object
+    # database and can be restored without rewriting them.
+    self._graph_cache = {}
+    self._create_initial_references()
+
+  def _create_initial_references(self):
+    """Creates the references pointing at the initial commit."""
+    self.repo.references.create(
+        'refs/heads/main', self._initial_commit, force=True)
     self.create_branch(f"branch_{self._initial_commit.hex}",
                        self._initial_commit)
     self.repo.references.create("refs/remotes/origin/main",
                                 self._initial_commit)
 
+  def reset(self):
+    """Resets the repository to its initial state, deleting every
+    reference and commit created since construction so the repository
+    can be shared across tests without a costly init/teardown cycle.
+    """
+    for ref in self.repo.listall_references():
+      self.repo.references.delete(ref)
+    self._create_initial_references()
+    self._commits.clear()
+    self._commits.add(self._initial_commit, "message")
+    self._nonce = 0
+    self._head = self._initial_commit
+
   def create_branch(self, name: str, commit: pygit2.Oid):
-    self.repo.references.create(f'refs/heads/{name}', commit)
+    """Creates the remote-tracking branch for a commit.
+
+    Impact analysis only consults refs/remotes (via branches.remote and
+    git branch -r --contains), so the matching local head would be a
+    second loose ref write per branch that nothing ever reads.
+    """
     self.repo.references.create(f'refs/remotes/origin/{name}', commit)
 
   def add_empty_commit(
@@ -56,103 +200,174 @@ class TestRepository:
       vulnerability: VulnerabilityType = VulnerabilityType.NONE,
       message: str = "Empty") -> pygit2.Oid:
     """
-    Adds a empty commit to the repository, tags it with the vulnerability 
-    type and adds it to the vulnerability list if specified 
+    Adds a empty commit to the repository, tags it with the vulnerability
+    type and adds it to the vulnerability list if specified
     """
 
-    tree = self.repo.TreeBuilder().write()
-    self._author = pygit2.Signature(
-        str(uuid.uuid1()), 'johnSmith@example.com'
-    )  #using a random uuid to avoid commits being the same
-    commit = None
-
-    if not parents or len(parents) == 0:
-      self.repo.create_branch(
-          'branch_temp', self.repo.revparse_single(self._initial_commit.hex))
-      commit = self.repo.create_commit('refs/heads/branch_temp', self._author,
-                                       self._commiter, message, tree,
-                                       [self._initial_commit])
-
-      self.repo.branches.delete('branch_temp')
-      self.create_branch(f'branch_{commit.hex}', commit)
-
-    else:
-      self.repo.create_branch('branch_temp',
-                              self.repo.revparse_single(parents[0].hex))
-      commit = self.repo.create_commit('refs/heads/branch_temp', self._author,
-                                       self._commiter, message, tree, parents)
-      self.repo.branches.delete('branch_temp')
-      self.create_branch(commit=commit, name=f'branch_{commit.hex}')
+    tree = self._empty_tree
+    # A monotonic author timestamp keeps commits with the same message
+    # and parents distinct while staying deterministic across builds.
+    self._nonce += 1
+    author = pygit2.Signature('John Smith', 'johnSmith@example.com',
+                              self._nonce)
+    if not parents:
+      parents = [self._initial_commit]
+    # Passing None as the reference writes the commit object without
+    # touching any ref, so no temporary branch needs to be created and
+    # deleted around it.
+    commit = self.repo.create_commit(None, author, self._commiter, message,
+                                     tree, parents)
+    self.create_branch(f'branch_{commit.hex}', commit)
 
     self.repo.references.get('refs/remotes/{0}/{1}'.format(
         "origin", "main")).set_target(commit)
     self.repo.references.get('refs/heads/main').set_target(commit)
+    self._head = commit
 
     if self.debug:
       os.system("echo -------------------------------" +
                 "-----------------------------------")
-      os.system(f"git -C osv/testdata/test_repositories/{self.name}" +
-                " log --all --graph --decorate")
+      os.system(f"git -C {self.repo_path}" + " log --all --graph --decorate")
 
       #self.repo.branches.delete(created_branch.branch_name)
 
-    match vulnerability:
-      case self.VulnerabilityType.INTRODUCED:
-        self.introduced.append(commit.hex)
-      case self.VulnerabilityType.FIXED:
-        self.fixed.append(commit.hex)
-      case self.VulnerabilityType.LAST_AFFECTED:
-        self.last_affected.append(commit.hex)
-      case self.VulnerabilityType.LIMIT:
-        self.limit.append(commit.hex)
-      case self.VulnerabilityType.NONE:
-        pass
-      case _:
-        raise ValueError("Invalid vulnerability type")
+    if not isinstance(vulnerability, VulnerabilityType):
+      raise ValueError("Invalid vulnerability type")
+    self._commits.add(commit, message, vulnerability)
     return commit
 
+  def build_graph(self, spec):
+    """Builds all the commits of a test graph in a single call.
+
+    spec is a list of (message, parent messages, vulnerability type)
+    tuples in creation order; parents reference earlier entries by
+    message, and an empty parent list starts the commit from the
+    initial commit like add_empty_commit does. Returns a dict mapping
+    each message to its commit id.
+    """
+    key = tuple((message, tuple(parents), vulnerability)
+                for message, parents, vulnerability in spec)
+    cached = self._graph_cache.get(key)
+    if cached is not None:
+      return self._restore_graph(key, cached)
+
+    commits = {}
+    for message, parents, vulnerability in spec:
+      commits[message] = self.add_empty_commit(
+          parents=[commits[parent] for parent in parents],
+          vulnerability=vulnerability,
+          message=message)
+    self._graph_cache[key] = dict(commits)
+    # Pack the per-commit branch refs into packed-refs so the analyzer's
+    # git subprocesses read one file instead of a loose ref per branch.
+    self.repo.references.compress()
+    # Generation numbers from the commit-graph let the analyzer's
+    # reachability queries cut off walks early.
+    repos.write_commit_graph(self.repo)
+    return commits
+
+  def _restore_graph(self, spec_key, commits):
+    """Restores the references and bookkeeping of a previously built graph.
+
+    Replays the reference and CommitsInfo side effects of
+    add_empty_commit over the cached commit ids (events come from the
+    spec itself) instead of creating new commit objects.
+    """
+    head = None
+    for message, _, vulnerability in spec_key:
+      commit = commits[message]
+      self.create_branch(f'branch_{commit.hex}', commit)
+      self._commits.add(commit, message, vulnerability)
+      head = commit
+    # Each restored commit consumed one nonce when it was first built, so
+    # later add_empty_commit calls must continue from the same count; a
+    # rewound nonce would mint an oid identical to a restored commit and
+    # make its branch creation collide.
+    self._nonce = len(spec_key)
+    if head is not None:
+      self.repo.references.get('refs/remotes/origin/main').set_target(head)
+      self.repo.references.get('refs/heads/main').set_target(head)
+      self._head = head
+    self.repo.references.compress()
+    return dict(commits)
+
   def remove(self):
-    shutil.rmtree(f"osv/testdata/test_repositories/{self.name}/")
-    while os.path.exists(
-        f"osv/testdata/test_repositories/{self.name}/"):  # check if it exists
-      pass
+    shutil.rmtree(self.repo_path)
     ##cleanup
-    self.introduced = []
-    self.fixed = []
-    self.last_affected = []
-    self.limit = []
+    self._commits.clear()
+
+  def get_head_hex(self) -> str:
+    """Returns the id (hex) of the current tip of main, served from the
+    cached oid instead of a revparse of HEAD.
+    """
+    return self._head.hex
 
-  def get_ranges(self):
+  def get_commit_ids(self, messages) -> frozenset:
+    """Returns the ids (hex) of the commits created with the given
+    messages, as a frozenset ready to compare against an affected set.
+    """
+    return frozenset(
+        self._commits.get_hex_by_message(message) for message in messages)
+
+  def get_message_by_commits_id(self, commit_ids) -> list[str]:
+    """Returns the creation messages of the given commit ids (hex),
+    resolved from the inverse index in O(1) per id instead of walking
+    the repository.
+    """
+    return [
+        self._commits.get_message_by_id(commit_id) for commit_id in commit_ids
+    ]
+
+  def get_ranges(self) -> EventRanges:
     """
         return the ranges of the repository
         """
-    return (self.introduced, self.fixed, self.last_affected, self.limit)
+    return self._commits.ranges()
 
-  def print_commits(self):
-    """ prints the commits of the repository
+  def _walk_commits(self):
+    """Yields each reachable commit exactly once, across all refs.
+
+    Walks from different refs overlap heavily; each walk is cut at the
+    first already-visited oid.
     """
-    print(self.name)
-    commits = []
+    visited = set()
     for ref in self.repo.listall_reference_objects():
       print(ref.target)
       for commit in self.repo.walk(ref.target, pygit2.GIT_SORT_TIME):
-
-        current_commit = {
-            'hash':
-                commit.hex,
-            'message':
-                commit.message,
-            'commit_date':
-                datetime.utcfromtimestamp(commit.commit_time
-                                         ).strftime('%Y-%m-%dT%H:%M:%SZ'),
-            'author_name':
-                commit.author.name,
-            'author_email':
-                commit.author.email,
-            'parents': [c.hex for c in commit.parents],
-        }
-        if current_commit in commits:
+        if commit.id in visited:
           break
-        commits.append(current_commit)
+        visited.add(commit.id)
+        yield commit
 
-    print(json.dumps(commits, indent=2))
\ No newline at end of file
+  def print_commits(self):
+    """ prints the commits of the repository
+    """
+    import json
+    from datetime import datetime
+
+    print(self.name)
+    # Bind the hot callables once; the loop body otherwise re-resolves
+    # them through module attributes on every commit.
+    dumps = json.dumps
+    utcfromtimestamp = datetime.utcfromtimestamp
+    # Dump one commit at a time rather than buffering every record and
+    # serializing the whole history in one go.
+    for commit in self._walk_commits():
+      author = commit.author
+      print(
+          dumps(
+              {
+                  'hash':
+                      commit.hex,
+                  'message':
+                      commit.message,
+                  'commit_date':
+                      utcfromtimestamp(commit.commit_time
+                                      ).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                  'author_name':
+                      author.name,
+                  'author_email':
+                      author.email,
+                  'parents': [c.hex for c in commit.parents],
+              },
+              indent=2))